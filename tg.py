@@ -1,33 +1,208 @@
 import os
 import re
 import json
+import mmap
 import asyncio
 import zipfile
 import tempfile
 import shutil
+import sqlite3
+import time
+import functools
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 import logging
 
 from telethon import TelegramClient, events, Button
-from telethon.errors import SessionPasswordNeededError, PhoneNumberInvalidError, ReplyMarkupInvalidError
+from telethon.errors import PhoneNumberInvalidError, ReplyMarkupInvalidError, FloodWaitError, ChannelPrivateError, UnauthorizedError
 from telethon.tl.functions.account import GetPasswordRequest, GetAuthorizationsRequest, ResetAuthorizationRequest
-from telethon.tl.functions.messages import GetHistoryRequest
-from telethon.tl.functions.auth import SendCodeRequest
+from telethon.tl.functions.messages import GetHistoryRequest, DeleteHistoryRequest
+from telethon.tl.functions.auth import SendCodeRequest, ResetAuthorizationsRequest
+from telethon.tl.functions.channels import LeaveChannelRequest
 from telethon.tl.types import User
+from telethon.sessions import SQLiteSession
 
 # Konfigurasi logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# JSON cepat untuk accounts.json jika orjson terpasang
+try:
+    import orjson
+    
+    def json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    
+    json_loads = orjson.loads
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    
+    def json_loads(data):
+        # json bawaan tidak menerima memoryview (dari mmap)
+        return json.loads(data if isinstance(data, (bytes, str)) else bytes(data))
+
+# Backend inflate untuk zipfile: isal | zlibng | stdlib (default isal, fallback stdlib)
+ZIP_BACKEND = os.environ.get('SESSIONMGR_ZIP_BACKEND', 'isal').lower()
+try:
+    if ZIP_BACKEND == 'isal':
+        from isal import isal_zlib
+        zipfile.zlib = isal_zlib
+    elif ZIP_BACKEND == 'zlibng':
+        from zlib_ng import zlib_ng
+        zipfile.zlib = zlib_ng
+except ImportError:
+    logger.info(f"ZIP backend '{ZIP_BACKEND}' tidak terpasang, memakai zlib bawaan")
+
+# Template pesan progress, hanya di-format saat edit benar-benar dikirim
+_CLEAR_PROGRESS = (
+    "🗑️ **CLEARING CHATS**\n\n"
+    "📊 Total: {tot} chats\n"
+    "✅ Cleared: {c}\n"
+    "⏳ Remaining: {r}"
+)
+_LEAVE_PROGRESS = (
+    "🚪 **LEAVING GROUPS**\n\n"
+    "📊 Progress: `{i}/{tot}`\n"
+    "✅ Left: `{left}`\n"
+    "👑 Staying Admin: `{admin}`\n"
+    "⏳ Remaining: `{r}`"
+)
+
+def _format_auth(auth, maxlen: int = 30):
+    """(info perangkat terpotong, waktu aktif terakhir atau None) untuk satu authorization"""
+    info = f"{auth.device_model} - {auth.platform}"
+    if len(info) > maxlen:
+        info = info[:maxlen] + "..."
+    
+    date_active = auth.date_active
+    if not date_active:
+        return info, None
+    try:
+        # Telethon biasanya sudah memberi datetime, tapi tetap terima timestamp
+        if isinstance(date_active, datetime):
+            date_active = date_active.timestamp()
+        return info, time.strftime('%d/%m/%Y %H:%M', time.localtime(date_active))
+    except Exception:
+        return info, None
+
+class AsyncTokenBucket:
+    """Rate limiter token bucket: hanya menunggu jika token benar-benar habis"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+    
+    async def acquire(self):
+        """Ambil satu token, tidur seperlunya jika belum tersedia"""
+        # Bagian cek/ambil token tidak ada await, jadi atomik di event loop tanpa lock;
+        # sleep dilakukan di luar bagian itu agar task lain tetap bisa jalan
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+    
+    def penalize(self, seconds: float):
+        """Kosongkan bucket sesuai FloodWait dari server"""
+        self._refill()
+        # Token berikutnya baru tersedia tepat setelah `seconds` detik
+        self._tokens = 1 - seconds * self._rate
+
+
 class SessionManager:
+    # Pattern OTP berlabel (Indonesia/English), selalu diutamakan
+    _OTP_LABELED_RE = re.compile(
+        r'(?:Kode masuk Anda|Your login code|Your code|Kode|code)\s*:?\s*(\d{5,6})',
+        re.IGNORECASE
+    )
+    # Angka 5-6 digit saja, dipakai jika tidak ada kode berlabel
+    _OTP_BARE_RE = re.compile(r'(?<!\d)(\d{5,6})(?!\d)')
+    # Kata kunci yang wajib ada jika hanya pattern umum yang cocok
+    _OTP_KEYWORDS_RE = re.compile(r'code|telegram|login|verification|kode|masuk|verifikasi', re.IGNORECASE)
+    # Path entry ZIP (separator sudah dinormalisasi ke '/') untuk folder sessions/users
+    _SESSIONS_DIR_RE = re.compile(r'(?:^|/)sessions/users/')
+    _SESSION_ENTRY_RE = re.compile(r'(?:^|/)sessions/users/[^/]+\.session$')
+    # Jumlah maksimal client akun yang tetap terhubung
+    MAX_CLIENTS = 32
+    # Lama (detik) hasil klasifikasi admin grup disimpan
+    ADMIN_CACHE_TTL = 60
+    # Lama (detik) daftar dialog akun disimpan
+    DIALOG_CACHE_TTL = 60
+    # Lama (detik) daftar session aktif dari check_sessions disimpan
+    AUTH_CACHE_TTL = 30
+    # Rate limit RPC per akun: jenis -> (token per detik, kapasitas burst)
+    RATE_LIMITS = {
+        'delete': (10.0, 10),
+        'leave': (2.0, 1),
+    }
+    # FloodWait (detik) terlama yang masih ditunggu lalu diulang; lebih lama dari ini aksi dihentikan.
+    # Telethon sendiri sudah menunggu otomatis sampai flood_sleep_threshold (60 detik)
+    FLOOD_RETRY_MAX = 30
+    # Ukuran accounts.json (byte) di atas ini dibaca lewat mmap
+    MMAP_THRESHOLD = 4 * 1024 * 1024
+    # ZIP sampai ukuran ini (byte) ditampung di memori sebelum dipindah ke file sementara
+    IN_MEMORY_ZIP_MAX = 64 * 1024 * 1024
+    # Jumlah session minimal sebelum validasi dijalankan paralel
+    PARALLEL_VALIDATE_MIN = 4
+    # Jeda minimal (detik) antar edit pesan progress
+    PROGRESS_INTERVAL = 2.0
+    # Jumlah worker yang keluar dari grup secara bersamaan
+    LEAVE_WORKERS = 3
+    
     def __init__(self, bot_token: str, api_id: int, api_hash: str, admin_ids: List[int]):
         self.bot_token = bot_token
         self.api_id = api_id
         self.api_hash = api_hash
         self.admin_ids = admin_ids
         self.bot = TelegramClient('bot', api_id, api_hash)
-        self.valid_sessions: Dict[str, dict] = {}
+        self.valid_sessions: Dict[int, dict] = {}
+        # Urutan = LRU: client paling lama tidak dipakai ada di depan
+        self._clients: "OrderedDict[int, TelegramClient]" = OrderedDict()
+        self._client_locks: Dict[int, asyncio.Lock] = {}
+        # user_id -> jumlah aksi yang sedang memakai client (tidak boleh di-evict)
+        self._client_users: Dict[int, int] = {}
+        # user_id yang session-nya diganti selagi client dipakai, diputus saat dilepas
+        self._stale_clients: set = set()
+        # Cache runtime per akun (tidak ikut disimpan ke accounts.json), dibersihkan bersama di _drop_client
+        # user_id -> (waktu monotonic, list dialog)
+        self._dialog_cache: Dict[int, tuple] = {}
+        self._tg_service_entity: Dict[int, Any] = {}
+        # user_id -> (waktu monotonic, (admin, bukan admin, gagal dicek))
+        self._admin_cache: Dict[int, tuple] = {}
+        # user_id -> (waktu monotonic, hasil GetAuthorizationsRequest)
+        self._auth_cache: Dict[int, tuple] = {}
+        self._session_objs: Dict[int, SQLiteSession] = {}
+        # user_id -> {jenis RPC: AsyncTokenBucket}
+        self._rate_limiters: Dict[int, Dict[str, AsyncTokenBucket]] = {}
+        # (CRC32, ukuran) file .session dari ZIP -> user_id yang sudah divalidasi
+        self._session_crcs: Dict[tuple, int] = {}
+        self._validate_sem = asyncio.Semaphore(20)
+        
+        # Tabel dispatch callback button (key bytes, sama seperti event.data)
+        self._callbacks = {
+            b'show_accounts': self.show_accounts,
+            b'back_accounts': self.show_accounts,
+            b'bot_info': self.show_bot_info,
+        }
+        self._account_callbacks = {
+            b'acc': self.show_account_info,
+            b'getotp': self.get_otp,
+            b'clear': self.clear_chats,
+            b'sessions': self.check_sessions,
+            b'killall': self.kill_all_sessions,
+            b'leavegroups': self.leave_groups,
+        }
         self.temp_dir = tempfile.mkdtemp()
         self.sessions_dir = os.path.join(os.getcwd(), 'validated_sessions')
         self.accounts_file = os.path.join(self.sessions_dir, 'accounts.json')
@@ -42,39 +217,38 @@ class SessionManager:
         """Cek apakah user adalah admin"""
         return user_id in self.admin_ids
     
-    async def check_admin_access(self, event):
-        """Cek akses admin dan kirim pesan jika bukan admin"""
-        if not self.is_admin(event.sender_id):
-            await event.respond(
-                "🚫 **ACCESS DENIED**\n\n"
-                "┌─────────────────────────┐\n"
-                "│  ⚠️  ADMIN ONLY BOT  ⚠️  │\n"
-                "└─────────────────────────┘\n\n"
-                "🔒 Bot ini hanya dapat digunakan oleh administrator yang berwenang.\n"
-                "📞 Hubungi admin untuk mendapatkan akses."
-            )
-            return False
-        return True
-    
     def load_saved_sessions(self):
         """Load session yang sudah disimpan"""
         try:
             if os.path.exists(self.accounts_file):
-                with open(self.accounts_file, 'r') as f:
-                    accounts_data = json.load(f)
+                with open(self.accounts_file, 'rb') as f:
+                    if os.path.getsize(self.accounts_file) > self.MMAP_THRESHOLD:
+                        # File besar: parse langsung dari mmap tanpa salinan bytes tambahan
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                            accounts_data = json_loads(view)
+                    else:
+                        accounts_data = json_loads(f.read())
                 
-                for user_id, data in accounts_data.items():
-                    session_path = os.path.join(self.sessions_dir, f"{user_id}.session")
-                    if os.path.exists(session_path):
-                        self.valid_sessions[user_id] = {
-                            'session_path': session_path,
-                            'phone': data['phone'],
-                            'username': data['username'],
-                            'user_id': user_id,
-                            'first_name': data.get('first_name', 'Unknown'),
-                            'last_name': data.get('last_name', ''),
-                            'validated_at': data.get('validated_at', '')
-                        }
+                # Satu kali scandir, bukan os.path.exists per akun
+                with os.scandir(self.sessions_dir) as entries:
+                    present = {e.name[:-len('.session')] for e in entries if e.name.endswith('.session')}
+                
+                for key, data in accounts_data.items():
+                    if key not in present:
+                        continue
+                    # Key JSON selalu string, simpan sebagai int di memori
+                    user_id = int(key)
+                    session_stem = os.path.join(self.sessions_dir, key)
+                    self.valid_sessions[user_id] = {
+                        'session_path': f"{session_stem}.session",
+                        'session_stem': session_stem,
+                        'phone': data['phone'],
+                        'username': data['username'],
+                        'user_id': user_id,
+                        'first_name': data.get('first_name', 'Unknown'),
+                        'last_name': data.get('last_name', ''),
+                        'validated_at': data.get('validated_at', '')
+                    }
                 
                 logger.info(f"Loaded {len(self.valid_sessions)} saved sessions")
         except Exception as e:
@@ -85,7 +259,7 @@ class SessionManager:
         try:
             accounts_data = {}
             for user_id, data in self.valid_sessions.items():
-                accounts_data[user_id] = {
+                accounts_data[str(user_id)] = {
                     'phone': data['phone'],
                     'username': data['username'],
                     'first_name': data.get('first_name', 'Unknown'),
@@ -93,22 +267,106 @@ class SessionManager:
                     'validated_at': data.get('validated_at', datetime.now().isoformat())
                 }
             
-            with open(self.accounts_file, 'w') as f:
-                json.dump(accounts_data, f, indent=2)
+            with open(self.accounts_file, 'wb') as f:
+                f.write(json_dumps(accounts_data))
             
             logger.info(f"Saved {len(accounts_data)} sessions")
         except Exception as e:
             logger.error(f"Error saving sessions: {e}")
+    
+    async def _get_client(self, user_id: int) -> TelegramClient:
+        """Ambil client yang sudah terhubung untuk user_id, buat baru jika belum ada"""
+        client = self._clients.get(user_id)
+        if client is not None and client.is_connected():
+            self._clients.move_to_end(user_id)
+            return client
+        
+        # Lock per akun agar tap beruntun tidak membuat dua koneksi sekaligus
+        async with self._client_locks.setdefault(user_id, asyncio.Lock()):
+            client = self._clients.get(user_id)
+            if client is not None and client.is_connected():
+                return client
+            
+            # Pakai ulang objek SQLiteSession agar file session tidak dibuka-ulang tiap reconnect
+            session = self._session_objs.get(user_id)
+            if session is None:
+                session = SQLiteSession(self.valid_sessions[user_id]['session_stem'])
+                self._session_objs[user_id] = session
+            
+            # Update akun tidak pernah dibaca, jangan jalankan update loop Telethon
+            client = TelegramClient(session, self.api_id, self.api_hash, receive_updates=False)
+            try:
+                await client.connect()
+            except BaseException:
+                # Koneksi setengah jadi tetap harus dilepas sebelum error diteruskan
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+                raise
+            self._clients[user_id] = client
+            self._clients.move_to_end(user_id)
+        
+        await self._evict_idle_clients()
+        return client
+    
+    async def _evict_idle_clients(self):
+        """Batasi jumlah koneksi terbuka, putuskan yang paling lama tidak dipakai dan sedang idle"""
+        for uid in list(self._clients):
+            # Dicek ulang tiap putaran: selama disconnect di-await, aksi lain bisa mengambil client
+            if len(self._clients) <= self.MAX_CLIENTS:
+                break
+            if uid not in self._clients or self._client_users.get(uid):
+                continue
+            await self._drop_client(uid)
+    
+    @asynccontextmanager
+    async def _session_client(self, user_id: int):
+        """Client akun dari pool untuk satu aksi; dibuang dari pool jika session sudah tidak sah"""
+        # Ditandai terpakai sebelum connect agar eviction tidak memutus client ini
+        self._client_users[user_id] = self._client_users.get(user_id, 0) + 1
+        try:
+            client = await self._get_client(user_id)
+            yield client
+        except UnauthorizedError:
+            # Session dicabut/expired, jangan pakai ulang koneksi ini
+            await self._drop_client(user_id)
+            raise
+        finally:
+            users = self._client_users.pop(user_id) - 1
+            if users:
+                self._client_users[user_id] = users
+            elif user_id in self._stale_clients:
+                # Session diganti upload baru selagi dipakai, koneksi lama baru diputus sekarang
+                self._stale_clients.discard(user_id)
+                await self._drop_client(user_id)
+            # Pool yang sempat melebihi batas karena semua client sibuk dikecilkan saat dilepas
+            await self._evict_idle_clients()
+    
+    async def _drop_client(self, user_id: int):
+        """Putuskan dan hapus client yang tersimpan untuk user_id"""
+        for cache in (self._tg_service_entity, self._dialog_cache, self._admin_cache,
+                      self._auth_cache, self._session_objs, self._rate_limiters):
+            cache.pop(user_id, None)
+        client = self._clients.pop(user_id, None)
+        if client is not None:
+            try:
+                await client.disconnect()
+            except Exception as e:
+                logger.error(f"Error disconnecting client {user_id}: {e}")
+    
+    async def close_clients(self):
+        """Putuskan semua client yang tersimpan"""
+        for user_id in list(self._clients):
+            await self._drop_client(user_id)
         
     async def start_bot(self):
         """Memulai bot"""
         await self.bot.start(bot_token=self.bot_token)
         
-        @self.bot.on(events.NewMessage(pattern='/start'))
+        # Pesan dari non-admin langsung dibuang di filter event, tanpa RPC balasan
+        @self.bot.on(events.NewMessage(pattern='/start', incoming=True, func=lambda e: self.is_admin(e.sender_id)))
         async def start_handler(event):
-            if not await self.check_admin_access(event):
-                return
-                
             welcome_text = (
                 "🤖 **TELEGRAM SESSION MANAGER**\n\n"
                 "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
@@ -130,18 +388,18 @@ class SessionManager:
             
             await event.respond(welcome_text, buttons=buttons)
         
-        @self.bot.on(events.NewMessage(pattern='/akun'))
+        self._callbacks[b'back_main'] = start_handler
+        
+        @self.bot.on(events.NewMessage(pattern='/akun', incoming=True, func=lambda e: self.is_admin(e.sender_id)))
         async def accounts_handler(event):
-            if not await self.check_admin_access(event):
-                return
-            await self.show_accounts(event)
+            await self.show_accounts(event, edit=False)
         
-        @self.bot.on(events.NewMessage)
+        @self.bot.on(events.NewMessage(
+            incoming=True,
+            func=lambda e: e.document and e.document.mime_type == 'application/zip' and self.is_admin(e.sender_id)
+        ))
         async def file_handler(event):
-            if not await self.check_admin_access(event):
-                return
-            if event.document and event.document.mime_type == 'application/zip':
-                await self.process_zip_file(event)
+            await self.process_zip_file(event)
         
         @self.bot.on(events.CallbackQuery)
         async def callback_handler(event):
@@ -150,34 +408,24 @@ class SessionManager:
                 return
             
             try:
-                data = event.data.decode('utf-8')
+                # Callback data dicocokkan langsung sebagai bytes, tanpa decode
+                data = event.data
                 
-                if data == "show_accounts":
-                    await self.show_accounts(event)
-                elif data == "bot_info":
-                    await self.show_bot_info(event)
-                elif data.startswith("acc_"):
-                    user_id = data.split("_")[1]
-                    await self.show_account_info(event, user_id)
-                elif data.startswith("getotp_"):
-                    user_id = data.split("_")[1]
-                    await self.get_otp(event, user_id)
-                elif data.startswith("clear_"):
-                    user_id = data.split("_")[1]
-                    await self.clear_chats(event, user_id)
-                elif data.startswith("sessions_"):
-                    user_id = data.split("_")[1]
-                    await self.check_sessions(event, user_id)
-                elif data.startswith("killall_"):
-                    user_id = data.split("_")[1]
-                    await self.kill_all_sessions(event, user_id)
-                elif data.startswith("leavegroups_"):
-                    user_id = data.split("_")[1]
-                    await self.leave_groups(event, user_id)
-                elif data == "back_accounts":
-                    await self.show_accounts(event)
-                elif data == "back_main":
-                    await start_handler(event)
+                # Aksi tanpa argumen (show_accounts, bot_info, ...) dicocokkan utuh
+                handler = self._callbacks.get(data)
+                if handler:
+                    await handler(event)
+                    return
+                
+                # Aksi per akun berbentuk "<aksi>_<user_id>[_<extra>]"
+                action, _, arg = data.partition(b'_')
+                handler = self._account_callbacks.get(action)
+                if handler and arg:
+                    uid, _, extra = arg.partition(b'_')
+                    if extra:
+                        await handler(event, int(uid), int(extra))
+                    else:
+                        await handler(event, int(uid))
             except Exception as e:
                 logger.error(f"Error in callback handler: {e}")
                 try:
@@ -187,6 +435,32 @@ class SessionManager:
         
         logger.info("Bot started successfully!")
         
+    async def _safe_edit(self, target, text, **kwargs):
+        """Edit pesan tanpa melempar error (untuk update progress di background)"""
+        try:
+            await target.edit(text, **kwargs)
+        except Exception as e:
+            logger.debug(f"Progress edit skipped: {e}")
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _back_button(user_id: int):
+        """Tombol BACK ke menu akun (di-cache, jangan diubah isinya)"""
+        return [[Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]]
+    
+    async def _settle_progress(self, task):
+        """Batalkan edit progress yang masih berjalan agar tidak menimpa pesan hasil/error"""
+        if task is not None:
+            if not task.done():
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    def _push_progress(self, prev_task, target, text):
+        """Jalankan edit progress di background, edit sebelumnya yang belum selesai dibatalkan"""
+        if prev_task is not None and not prev_task.done():
+            prev_task.cancel()
+        return asyncio.create_task(self._safe_edit(target, text))
+    
     async def show_bot_info(self, event):
         """Menampilkan info bot"""
         info_text = (
@@ -223,26 +497,33 @@ class SessionManager:
             "⏳ Downloading and extracting..."
         )
         
+        # Folder sementara khusus upload ini agar upload paralel tidak saling timpa
+        upload_dir = await asyncio.to_thread(tempfile.mkdtemp, dir=self.temp_dir)
+        validate_tasks = []
+        progress_task = None
+        
         try:
-            # Download file
-            file_path = await event.download_media(self.temp_dir)
+            # Download file per chunk ke spool: di memori selama kecil, pindah ke disk jika besar.
+            # Write lewat thread karena setelah rollover (dan saat rollover) menulis ke disk
+            zip_source = tempfile.SpooledTemporaryFile(max_size=self.IN_MEMORY_ZIP_MAX, dir=upload_dir)
+            async for chunk in event.client.iter_download(event.document):
+                await asyncio.to_thread(zip_source.write, chunk)
+            zip_source.seek(0)
             
             await status_msg.edit(
                 "🔄 **PROCESSING ZIP FILE**\n\n"
                 "📂 Searching for sessions folder..."
             )
             
-            # Extract ZIP
-            extract_dir = os.path.join(self.temp_dir, "extracted")
-            with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
-            
-            # Cari folder sessions/users
-            sessions_path = None
-            for root, dirs, files in os.walk(extract_dir):
-                if root.endswith('sessions/users') or root.endswith('sessions\\users'):
-                    sessions_path = root
-                    break
+            # Extract hanya file .session dari sessions/users langsung ke folder kerja
+            extract_dir = os.path.join(upload_dir, "extracted")
+            # Session dari upload sebelumnya yang masih tersimpan tidak perlu diproses ulang
+            known_crcs = frozenset(
+                key for key, uid in self._session_crcs.items() if uid in self.valid_sessions
+            )
+            sessions_path, session_files, crcs, already_stored = await asyncio.to_thread(
+                self._extract_and_collect, zip_source, extract_dir, known_crcs
+            )
             
             if not sessions_path:
                 await status_msg.edit(
@@ -260,10 +541,7 @@ class SessionManager:
                 )
                 return
             
-            # Proses session files
-            session_files = [f for f in os.listdir(sessions_path) if f.endswith('.session')]
-            
-            if not session_files:
+            if not session_files and not already_stored:
                 await status_msg.edit(
                     "❌ **NO SESSIONS FOUND**\n\n"
                     "📁 Tidak ada file `.session` ditemukan di folder users"
@@ -280,31 +558,39 @@ class SessionManager:
             skipped_2fa = 0
             invalid_count = 0
             
-            for i, session_file in enumerate(session_files, 1):
-                session_path = os.path.join(sessions_path, session_file)
-                result = await self.validate_session(session_path)
-                
-                # Update progress
-                if i % 5 == 0 or i == len(session_files):
-                    try:
-                        await status_msg.edit(
-                            f"🔍 **VALIDATING SESSIONS**\n\n"
-                            f"📁 Total: `{len(session_files)}` files\n"
-                            f"⏳ Progress: `{i}/{len(session_files)}`\n\n"
-                            f"✅ Valid: `{valid_count}`\n"
-                            f"🔒 2FA Skipped: `{skipped_2fa}`\n"
-                            f"❌ Invalid: `{invalid_count}`"
-                        )
-                    except:
-                        pass
+            async def run(session_file):
+                return session_file, await self.validate_session(os.path.join(sessions_path, session_file))
+            
+            if len(session_files) < self.PARALLEL_VALIDATE_MIN:
+                # ZIP kecil: validasi berurutan, overhead task tidak sepadan
+                pending = (run(f) for f in session_files)
+            else:
+                # Validasi paralel (dibatasi semaphore di validate_session), diproses sesuai urutan selesai
+                validate_tasks = [asyncio.create_task(run(f)) for f in session_files]
+                pending = asyncio.as_completed(validate_tasks)
+            
+            last_edit = 0.0
+            
+            for i, job in enumerate(pending, 1):
+                session_file, result = await job
                 
                 if result['valid'] and not result['has_2fa']:
-                    # Copy session ke directory kerja
-                    work_session_path = os.path.join(self.sessions_dir, f"{result['user_id']}.session")
-                    shutil.copy2(session_path, work_session_path)
+                    # Tutup client lama sebelum file session ditimpa; jika masih dipakai aksi lain,
+                    # diputus setelah aksi itu selesai
+                    if self._client_users.get(result['user_id']):
+                        self._stale_clients.add(result['user_id'])
+                    else:
+                        await self._drop_client(result['user_id'])
+                    
+                    # Pindahkan session ke directory kerja
+                    session_path = os.path.join(sessions_path, session_file)
+                    work_session_stem = os.path.join(self.sessions_dir, str(result['user_id']))
+                    work_session_path = f"{work_session_stem}.session"
+                    await asyncio.to_thread(shutil.move, session_path, work_session_path)
                     
                     self.valid_sessions[result['user_id']] = {
                         'session_path': work_session_path,
+                        'session_stem': work_session_stem,
                         'phone': result['phone'],
                         'username': result['username'],
                         'user_id': result['user_id'],
@@ -312,11 +598,30 @@ class SessionManager:
                         'last_name': result.get('last_name', ''),
                         'validated_at': datetime.now().isoformat()
                     }
+                    self._session_crcs[crcs[session_file]] = result['user_id']
                     valid_count += 1
                 elif result['valid'] and result['has_2fa']:
                     skipped_2fa += 1
                 else:
                     invalid_count += 1
+                
+                # Update progress maksimal tiap PROGRESS_INTERVAL detik, tanpa menunggu RPC edit selesai
+                now = time.monotonic()
+                if now - last_edit > self.PROGRESS_INTERVAL:
+                    last_edit = now
+                    progress_task = self._push_progress(
+                        progress_task,
+                        status_msg,
+                        f"🔍 **VALIDATING SESSIONS**\n\n"
+                        f"📁 Total: `{len(session_files)}` files\n"
+                        f"⏳ Progress: `{i}/{len(session_files)}`\n\n"
+                        f"✅ Valid: `{valid_count}`\n"
+                        f"🔒 2FA Skipped: `{skipped_2fa}`\n"
+                        f"❌ Invalid: `{invalid_count}`"
+                    )
+            
+            # Pastikan edit progress terakhir tidak menimpa hasil akhir
+            await self._settle_progress(progress_task)
             
             # Simpan data session
             self.save_sessions()
@@ -326,10 +631,11 @@ class SessionManager:
                 "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
                 "┃        📊  **RESULTS**  📊       ┃\n"
                 "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
-                f"📁 **Total Files:** `{len(session_files)}`\n"
+                f"📁 **Total Files:** `{len(session_files) + already_stored}`\n"
                 f"✅ **Valid Sessions:** `{valid_count}`\n"
                 f"🔒 **2FA Skipped:** `{skipped_2fa}`\n"
-                f"❌ **Invalid:** `{invalid_count}`\n\n"
+                f"❌ **Invalid:** `{invalid_count}`\n"
+                f"♻️ **Already Stored:** `{already_stored}`\n\n"
                 f"💾 **Saved to:** `{self.sessions_dir}`\n\n"
                 "🎉 Sessions berhasil disimpan dan siap digunakan!"
             )
@@ -350,57 +656,108 @@ class SessionManager:
                 "• Periksa struktur folder\n"
                 "• Coba upload ulang"
             )
+            await self._settle_progress(progress_task)
             await status_msg.edit(error_text)
             logger.error(f"Error processing ZIP: {e}")
         finally:
-            # Cleanup
+            # Validasi yang masih berjalan memegang file session di upload_dir, hentikan dulu
+            for task in validate_tasks:
+                task.cancel()
+            await asyncio.gather(*validate_tasks, return_exceptions=True)
+            
+            # Cleanup seluruh folder upload (di thread terpisah agar event loop tidak terblokir)
+            if 'zip_source' in locals():
+                zip_source.close()
+            await asyncio.to_thread(shutil.rmtree, upload_dir, ignore_errors=True)
+    
+    def _extract_and_collect(self, zip_source, extract_dir: str, known_crcs=frozenset()):
+        """Stream file .session dari sessions/users ke extract_dir, lewati CRC yang sudah dikenal"""
+        session_files = []
+        crcs = {}
+        already_stored = 0
+        os.makedirs(extract_dir, exist_ok=True)
+        with zipfile.ZipFile(zip_source, 'r') as zip_ref:
+            infos = [(i, i.filename.replace('\\', '/')) for i in zip_ref.infolist()]
+            if not any(self._SESSIONS_DIR_RE.search(norm) for _, norm in infos):
+                return None, [], {}, 0
+            
+            for info, norm in infos:
+                if not self._SESSION_ENTRY_RE.search(norm):
+                    continue
+                # CRC32 saja bisa bentrok, cocokkan juga ukuran file
+                key = (info.CRC, info.file_size)
+                if key in known_crcs:
+                    already_stored += 1
+                    continue
+                # Nama sama di folder sessions/users lain: pakai yang pertama, seperti sebelumnya
+                base = os.path.basename(norm)
+                if base in crcs:
+                    logger.info(f"Duplicate session name {base} in ZIP, keeping the first one")
+                    continue
+                # Stream entry langsung ke root extract_dir (tanpa folder perantara)
+                with zip_ref.open(info) as src, open(os.path.join(extract_dir, base), 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                crcs[base] = key
+                session_files.append(base)
+        return extract_dir, session_files, crcs, already_stored
+    
+    def _has_auth_key(self, session_path: str) -> bool:
+        """Cek lokal (tanpa jaringan) apakah file session SQLite berisi auth key"""
+        try:
+            conn = sqlite3.connect(session_path)
             try:
-                if 'file_path' in locals():
-                    os.remove(file_path)
-                if 'extract_dir' in locals():
-                    shutil.rmtree(extract_dir)
-            except:
-                pass
+                row = conn.execute("SELECT auth_key FROM sessions LIMIT 1").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Invalid session file {session_path}: {e}")
+            return False
+        return bool(row and row[0])
     
     async def validate_session(self, session_path: str) -> dict:
         """Validasi session file"""
-        try:
-            session_name = os.path.splitext(os.path.basename(session_path))[0]
-            client = TelegramClient(session_path.replace('.session', ''), self.api_id, self.api_hash)
-            
-            await client.connect()
-            
-            if not await client.is_user_authorized():
-                await client.disconnect()
-                return {'valid': False, 'has_2fa': False, 'user_id': None, 'phone': None, 'username': None}
-            
-            # Cek 2FA
-            has_2fa = False
-            try:
-                me = await client.get_me()
-            except SessionPasswordNeededError:
-                has_2fa = True
-                await client.disconnect()
-                return {'valid': True, 'has_2fa': True, 'user_id': None, 'phone': None, 'username': None}
-            
-            await client.disconnect()
-            
-            return {
-                'valid': True,
-                'has_2fa': False,
-                'user_id': str(me.id),
-                'phone': me.phone,
-                'username': me.username or 'None',
-                'first_name': me.first_name or 'Unknown',
-                'last_name': me.last_name or ''
-            }
-            
-        except Exception as e:
-            logger.error(f"Error validating session {session_path}: {e}")
+        # File session rusak/kosong langsung ditolak tanpa koneksi ke Telegram
+        if not await asyncio.to_thread(self._has_auth_key, session_path):
             return {'valid': False, 'has_2fa': False, 'user_id': None, 'phone': None, 'username': None}
+        
+        # Batasi jumlah koneksi validasi yang berjalan bersamaan
+        async with self._validate_sem:
+            try:
+                client = TelegramClient(
+                    session_path[:-len('.session')], self.api_id, self.api_hash, receive_updates=False
+                )
+                await client.connect()
+                
+                try:
+                    # get_me() mengembalikan None jika session tidak terotorisasi,
+                    # jadi tidak perlu RPC is_user_authorized() terpisah
+                    me = await client.get_me()
+                    if me is None:
+                        return {'valid': False, 'has_2fa': False, 'user_id': None, 'phone': None, 'username': None}
+                    
+                    # Cek 2FA (cloud password) langsung dari akun
+                    password = await client(GetPasswordRequest())
+                    if password.has_password:
+                        return {'valid': True, 'has_2fa': True, 'user_id': None, 'phone': None, 'username': None}
+                finally:
+                    await client.disconnect()
+                
+                return {
+                    'valid': True,
+                    'has_2fa': False,
+                    'user_id': me.id,
+                    'phone': me.phone,
+                    'username': me.username or 'None',
+                    'first_name': me.first_name or 'Unknown',
+                    'last_name': me.last_name or ''
+                }
+                
+            except Exception as e:
+                logger.error(f"Error validating session {session_path}: {e}")
+                return {'valid': False, 'has_2fa': False, 'user_id': None, 'phone': None, 'username': None}
     
-    async def show_accounts(self, event):
-        """Menampilkan daftar akun"""
+    async def show_accounts(self, event, edit: bool = True):
+        """Menampilkan daftar akun (edit=False untuk membalas command, bukan callback)"""
         if not self.valid_sessions:
             text = (
                 "📱 **ACCOUNT MANAGER**\n\n"
@@ -417,14 +774,14 @@ class SessionManager:
             buttons = [[Button.inline("⬅️ MAIN MENU", b"back_main")]]
         else:
             # Urutkan berdasarkan user_id (terendah ke tertinggi)
-            sorted_accounts = sorted(self.valid_sessions.items(), key=lambda x: int(x[0]))
+            sorted_accounts = sorted(self.valid_sessions.items())
             
-            text = (
+            parts = [
                 "📱 **ACCOUNT MANAGER**\n\n"
                 "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
                 f"┃     📊  {len(sorted_accounts)} ACCOUNTS READY  📊     ┃\n"
                 "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
-            )
+            ]
             
             buttons = []
             
@@ -438,18 +795,22 @@ class SessionManager:
                 if len(display_name) > 15:
                     display_name = display_name[:15] + "..."
                 
-                text += f"**{i:02d}.** `{phone}` • @{username}\n"
-                text += f"     👤 {display_name} • ID: `{user_id}`\n\n"
+                parts.append(
+                    f"**{i:02d}.** `{phone}` • @{username}\n"
+                    f"     👤 {display_name} • ID: `{user_id}`\n\n"
+                )
                 
                 buttons.append([Button.inline(f"📞 {phone}", f"acc_{user_id}".encode())])
             
             if len(sorted_accounts) > 20:
-                text += f"... dan {len(sorted_accounts) - 20} akun lainnya"
+                parts.append(f"... dan {len(sorted_accounts) - 20} akun lainnya")
+            
+            text = "".join(parts)
             
             buttons.append([Button.inline("⬅️ MAIN MENU", b"back_main")])
         
         try:
-            if hasattr(event, 'edit'):
+            if edit:
                 await event.edit(text, buttons=buttons)
             else:
                 await event.respond(text, buttons=buttons)
@@ -457,7 +818,7 @@ class SessionManager:
             # Fallback jika button error
             await event.respond(text)
     
-    async def show_account_info(self, event, user_id: str):
+    async def show_account_info(self, event, user_id: int):
         """Menampilkan informasi detail akun"""
         if user_id not in self.valid_sessions:
             await event.answer("❌ Akun tidak ditemukan", alert=True)
@@ -476,74 +837,58 @@ class SessionManager:
         
         try:
             session_data = self.valid_sessions[user_id]
-            session_path = session_data['session_path'].replace('.session', '')
-            
-            client = TelegramClient(session_path, self.api_id, self.api_hash)
-            await client.connect()
-            
-            if not await client.is_user_authorized():
-                await event.edit("❌ **Session Invalid**\n\nSession sudah tidak aktif")
-                await client.disconnect()
-                return
-            
-            me = await client.get_me()
-            
-            # Hitung grup yang dimiliki/admin
-            admin_groups = 0
-            total_groups = 0
-            
-            async for dialog in client.iter_dialogs():
-                if dialog.is_group or dialog.is_channel:
-                    total_groups += 1
+            async with self._session_client(user_id) as client:
+                if not await client.is_user_authorized():
+                    await event.edit("❌ **Session Invalid**\n\nSession sudah tidak aktif")
+                    return
+                
+                me = await client.get_me()
+                
+                # Hitung grup yang dimiliki/admin
+                admin_list, other_list, error_list = await self._classify_groups(user_id, client)
+                admin_groups = len(admin_list)
+                total_groups = admin_groups + len(other_list) + len(error_list)
+                
+                # Format tanggal validasi
+                validated_at = session_data.get('validated_at', '')
+                if validated_at:
                     try:
-                        permissions = await client.get_permissions(dialog.entity, me)
-                        if permissions.is_admin or permissions.is_creator:
-                            admin_groups += 1
+                        date_obj = datetime.fromisoformat(validated_at.replace('Z', '+00:00'))
+                        validated_str = date_obj.strftime('%d/%m/%Y %H:%M')
                     except:
-                        continue
-            
-            await client.disconnect()
-            
-            # Format tanggal validasi
-            validated_at = session_data.get('validated_at', '')
-            if validated_at:
-                try:
-                    date_obj = datetime.fromisoformat(validated_at.replace('Z', '+00:00'))
-                    validated_str = date_obj.strftime('%d/%m/%Y %H:%M')
-                except:
+                        validated_str = 'Unknown'
+                else:
                     validated_str = 'Unknown'
-            else:
-                validated_str = 'Unknown'
-            
-            full_name = f"{me.first_name or ''} {me.last_name or ''}".strip()
-            
-            text = (
-                f"👤 **ACCOUNT DETAILS**\n\n"
-                "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
-                "┃       📋  **INFO**  📋        ┃\n"
-                "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
-                f"📞 **Phone:** `{me.phone or 'Unknown'}`\n"
-                f"🆔 **Telegram ID:** `{me.id}`\n"
-                f"👤 **Name:** `{full_name or 'Unknown'}`\n"
-                f"🔗 **Username:** @{me.username or 'None'}\n\n"
-                "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
-                "┃      📊  **STATS**  📊       ┃\n"
-                "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
-                f"👑 **Admin Groups:** `{admin_groups}`\n"
-                f"💬 **Total Groups:** `{total_groups}`\n"
-                f"✅ **Validated:** `{validated_str}`\n\n"
-                "🔧 **Available Actions:**"
-            )
-            
-            buttons = [
-                [Button.inline("📨 GET OTP", f"getotp_{user_id}".encode()),
-                 Button.inline("🗑️ CLEAR CHAT", f"clear_{user_id}".encode())],
-                [Button.inline("🚪 LEAVE GROUPS", f"leavegroups_{user_id}".encode()),
-                 Button.inline("📱 SESSIONS", f"sessions_{user_id}".encode())],
-                [Button.inline("⬅️ BACK TO LIST", b"back_accounts")]
-            ]
-            
-            await event.edit(text, buttons=buttons)
+                
+                full_name = f"{me.first_name or ''} {me.last_name or ''}".strip()
+                
+                text = (
+                    f"👤 **ACCOUNT DETAILS**\n\n"
+                    "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
+                    "┃       📋  **INFO**  📋        ┃\n"
+                    "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
+                    f"📞 **Phone:** `{me.phone or 'Unknown'}`\n"
+                    f"🆔 **Telegram ID:** `{me.id}`\n"
+                    f"👤 **Name:** `{full_name or 'Unknown'}`\n"
+                    f"🔗 **Username:** @{me.username or 'None'}\n\n"
+                    "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
+                    "┃      📊  **STATS**  📊       ┃\n"
+                    "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
+                    f"👑 **Admin Groups:** `{admin_groups}`\n"
+                    f"💬 **Total Groups:** `{total_groups}`\n"
+                    f"✅ **Validated:** `{validated_str}`\n\n"
+                    "🔧 **Available Actions:**"
+                )
+                
+                buttons = [
+                    [Button.inline("📨 GET OTP", f"getotp_{user_id}".encode()),
+                     Button.inline("🗑️ CLEAR CHAT", f"clear_{user_id}".encode())],
+                    [Button.inline("🚪 LEAVE GROUPS", f"leavegroups_{user_id}".encode()),
+                     Button.inline("📱 SESSIONS", f"sessions_{user_id}".encode())],
+                    [Button.inline("⬅️ BACK TO LIST", b"back_accounts")]
+                ]
+                
+                await event.edit(text, buttons=buttons)
             
         except Exception as e:
             error_text = (
@@ -556,83 +901,155 @@ class SessionManager:
             except:
                 await event.respond(error_text)
     
-    async def get_telegram_messages(self, client, get_latest_only=False):
+    async def _get_group_permissions(self, client, dialogs) -> list:
+        """Ambil permission akun sendiri untuk setiap dialog secara paralel (None jika gagal)"""
+        sem = asyncio.Semaphore(10)
+        
+        async def fetch(dialog):
+            async with sem:
+                try:
+                    # 'me' = InputPeerSelf, tidak perlu RPC get_me() terlebih dulu
+                    return await client.get_permissions(dialog.entity, 'me')
+                except Exception as e:
+                    logger.error(f"Error checking permissions for {dialog.name}: {e}")
+                    return None
+        
+        return await asyncio.gather(*(fetch(d) for d in dialogs))
+    
+    def _get_bucket(self, user_id: int, kind: str) -> AsyncTokenBucket:
+        """Rate limiter per akun per jenis RPC"""
+        buckets = self._rate_limiters.setdefault(user_id, {})
+        bucket = buckets.get(kind)
+        if bucket is None:
+            rate, capacity = self.RATE_LIMITS[kind]
+            bucket = buckets[kind] = AsyncTokenBucket(rate, capacity)
+        return bucket
+    
+    async def _get_dialogs(self, user_id: int, client) -> list:
+        """Ambil semua dialog akun (termasuk arsip), di-cache sementara agar bisa dipakai ulang antar aksi"""
+        cached = self._dialog_cache.get(user_id)
+        if cached and time.monotonic() - cached[0] < self.DIALOG_CACHE_TTL:
+            return cached[1]
+        
+        dialogs = await client.get_dialogs(limit=None)
+        self._dialog_cache[user_id] = (time.monotonic(), dialogs)
+        return dialogs
+    
+    @staticmethod
+    def _admin_flag(entity) -> Optional[bool]:
+        """Status admin dari flag entity (Channel/Chat), None jika perlu get_permissions"""
+        if hasattr(entity, 'creator') or hasattr(entity, 'admin_rights'):
+            return bool(getattr(entity, 'creator', False) or getattr(entity, 'admin_rights', None) is not None)
+        return None
+    
+    async def _classify_groups(self, user_id: int, client):
+        """Pisahkan grup/channel jadi (admin, bukan admin, gagal dicek), di-cache sementara"""
+        cached = self._admin_cache.get(user_id)
+        if cached and time.monotonic() - cached[0] < self.ADMIN_CACHE_TTL:
+            return cached[1]
+        
+        admin_groups = []
+        other_groups = []
+        error_groups = []
+        unresolved = []
+        
+        dialogs = await self._get_dialogs(user_id, client)
+        for dialog in dialogs:
+            if not (dialog.is_group or dialog.is_channel):
+                continue
+            # Channel/Chat sudah membawa flag creator/admin_rights dari iter_dialogs
+            is_admin = self._admin_flag(dialog.entity)
+            if is_admin is None:
+                unresolved.append(dialog)
+            elif is_admin:
+                admin_groups.append(dialog)
+            else:
+                other_groups.append(dialog)
+        
+        # Hanya dialog tanpa flag yang perlu RPC get_permissions
+        if unresolved:
+            permissions_list = await self._get_group_permissions(client, unresolved)
+            for dialog, permissions in zip(unresolved, permissions_list):
+                if permissions is None:
+                    error_groups.append(dialog)
+                elif permissions.is_admin or permissions.is_creator:
+                    admin_groups.append(dialog)
+                else:
+                    other_groups.append(dialog)
+        
+        result = (admin_groups, other_groups, error_groups)
+        self._admin_cache[user_id] = (time.monotonic(), result)
+        return result
+    
+    async def get_telegram_messages(self, client, user_id: int, get_latest_only=False):
         """Get messages from Telegram service number +42777 with OTP extraction"""
         try:
-            # Cari Telegram service
-            telegram_service = None
-            try:
-                telegram_service = await client.get_entity("+42777")
-            except:
+            # Cari Telegram service (pakai cache per akun jika sudah pernah ditemukan)
+            telegram_service = self._tg_service_entity.get(user_id)
+            if telegram_service is None:
                 try:
-                    telegram_service = await client.get_entity("Telegram")
+                    telegram_service = await client.get_entity("+42777")
                 except:
-                    dialogs = await client.get_dialogs()
-                    for dialog in dialogs:
-                        if (hasattr(dialog.entity, 'phone') and dialog.entity.phone == "+42777") or \
-                           dialog.name == "Telegram":
-                            telegram_service = dialog.entity
-                            break
+                    try:
+                        telegram_service = await client.get_entity("Telegram")
+                    except:
+                        # Chat layanan Telegram selalu ada di antara dialog terbaru
+                        async for dialog in client.iter_dialogs(limit=200):
+                            if (hasattr(dialog.entity, 'phone') and dialog.entity.phone == "+42777") or \
+                               dialog.name == "Telegram":
+                                telegram_service = dialog.entity
+                                break
+                
+                if telegram_service:
+                    self._tg_service_entity[user_id] = telegram_service
             
             if not telegram_service:
                 return ["📭 Chat dengan layanan Telegram (+42777) tidak ditemukan"]
             
             # Get messages
-            limit = 3 if get_latest_only else 10
+            # OTP terbaru hampir selalu ada di 1-2 pesan teratas
+            limit = 2 if get_latest_only else 5
             service_messages = await client.get_messages(telegram_service, limit=limit)
             
-            # Pattern untuk extract OTP
-            otp_patterns = [
-                r'Your login code:?\s*(\d{5,6})',
-                r'Kode masuk Anda:?\s*(\d{5,6})',
-                r'Your code:?\s*(\d{5,6})',
-                r'Kode:?\s*(\d{5,6})',
-                r'code:?\s*(\d{5,6})',
-                r'(\d{5,6})'
-            ]
-            
             results = []
             
             for msg in service_messages:
-                if msg and msg.message:
-                    message_content = msg.message
-                    
-                    # Format waktu dengan timezone handling
-                    try:
-                        if msg.date.tzinfo is None:
-                            msg_time = msg.date.replace(tzinfo=timezone.utc)
-                        else:
-                            msg_time = msg.date
-                        
-                        time_str = msg_time.strftime('%d/%m/%Y %H:%M UTC')
-                    except:
-                        time_str = 'Unknown time'
-                    
-                    # Cari OTP
-                    otp_found = False
-                    for pattern in otp_patterns:
-                        otp_match = re.search(pattern, message_content, re.IGNORECASE)
-                        if otp_match:
-                            otp_code = otp_match.group(1)
-                            
-                            # Verifikasi ini pesan OTP
-                            if pattern == r'(\d{5,6})':
-                                otp_terms = ['code', 'telegram', 'login', 'verification', 
-                                           'kode', 'masuk', 'verifikasi']
-                                if not any(term.lower() in message_content.lower() for term in otp_terms):
-                                    continue
-                            
-                            result_text = (
-                                f"🔐 **OTP CODE:** `{otp_code}`\n"
-                                f"⏰ **Time:** {time_str}"
-                            )
-                            
-                            results.append(result_text)
-                            otp_found = True
-                            break
+                if not (msg and msg.message):
+                    continue
+                message_content = msg.message
+                
+                # Pesan tanpa deret 5-6 digit pasti bukan OTP
+                bare_match = self._OTP_BARE_RE.search(message_content)
+                if not bare_match:
+                    continue
+                
+                # Kode berlabel menang atas angka lain yang muncul lebih dulu
+                labeled_match = self._OTP_LABELED_RE.search(message_content)
+                if labeled_match:
+                    otp_code = labeled_match.group(1)
+                else:
+                    # Verifikasi ini pesan OTP jika yang cocok hanya angka tanpa label
+                    if not self._OTP_KEYWORDS_RE.search(message_content):
+                        continue
+                    otp_code = bare_match.group(1)
+                
+                # Format waktu hanya untuk pesan yang berisi OTP
+                try:
+                    if msg.date.tzinfo is None:
+                        msg_time = msg.date.replace(tzinfo=timezone.utc)
+                    else:
+                        msg_time = msg.date
                     
-                    if otp_found and get_latest_only:
-                        break
+                    time_str = msg_time.strftime('%d/%m/%Y %H:%M UTC')
+                except:
+                    time_str = 'Unknown time'
+                
+                results.append(
+                    f"🔐 **OTP CODE:** `{otp_code}`\n"
+                    f"⏰ **Time:** {time_str}"
+                )
+                if get_latest_only:
+                    return results
             
             return results if results else ["📭 Tidak ada pesan OTP ditemukan"]
             
@@ -640,7 +1057,7 @@ class SessionManager:
             logger.error(f"Error getting Telegram messages: {e}")
             return [f"❌ Error: {str(e)}"]
     
-    async def get_otp(self, event, user_id: str):
+    async def get_otp(self, event, user_id: int):
         """Mendapatkan OTP dari +42777"""
         loading_text = (
             "🔍 **SEARCHING OTP**\n\n"
@@ -654,34 +1071,27 @@ class SessionManager:
             await event.respond(loading_text)
         
         try:
-            session_data = self.valid_sessions[user_id]
-            session_path = session_data['session_path'].replace('.session', '')
-            
-            client = TelegramClient(session_path, self.api_id, self.api_hash)
-            await client.connect()
-            
-            otp_messages = await self.get_telegram_messages(client, get_latest_only=True)
-            
-            await client.disconnect()
-            
-            if otp_messages and otp_messages[0] != "📭 Chat dengan layanan Telegram (+42777) tidak ditemukan":
-                text = (
-                    "📨 **OTP RETRIEVED**\n\n"
-                    f"{otp_messages[0]}\n\n"
-                    "💡 **Quick Copy:** Tap the code to copy"
-                )
-            else:
-                text = (
-                    "📭 **NO OTP FOUND**\n\n"
-                    "❌ Tidak ada pesan OTP dari layanan Telegram (+42777)\n\n"
-                    "💡 **Tips:**\n"
-                    "• Pastikan ada pesan dari +42777\n"
-                    "• Coba login ke Telegram untuk dapat OTP\n"
-                    "• Periksa folder chat lainnya"
-                )
-            
-            buttons = [[Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]]
-            await event.edit(text, buttons=buttons)
+            async with self._session_client(user_id) as client:
+                otp_messages = await self.get_telegram_messages(client, user_id, get_latest_only=True)
+                
+                if otp_messages and otp_messages[0] != "📭 Chat dengan layanan Telegram (+42777) tidak ditemukan":
+                    text = (
+                        "📨 **OTP RETRIEVED**\n\n"
+                        f"{otp_messages[0]}\n\n"
+                        "💡 **Quick Copy:** Tap the code to copy"
+                    )
+                else:
+                    text = (
+                        "📭 **NO OTP FOUND**\n\n"
+                        "❌ Tidak ada pesan OTP dari layanan Telegram (+42777)\n\n"
+                        "💡 **Tips:**\n"
+                        "• Pastikan ada pesan dari +42777\n"
+                        "• Coba login ke Telegram untuk dapat OTP\n"
+                        "• Periksa folder chat lainnya"
+                    )
+                
+                buttons = self._back_button(user_id)
+                await event.edit(text, buttons=buttons)
             
         except Exception as e:
             error_text = (
@@ -689,13 +1099,13 @@ class SessionManager:
                 f"🚨 **Error:** `{str(e)}`\n\n"
                 "💡 Kemungkinan session expired atau tidak ada akses ke chat +42777"
             )
-            buttons = [[Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]]
+            buttons = self._back_button(user_id)
             try:
                 await event.edit(error_text, buttons=buttons)
             except:
                 await event.respond(error_text, buttons=buttons)
     
-    async def clear_chats(self, event, user_id: str):
+    async def clear_chats(self, event, user_id: int):
         """Menghapus semua chat"""
         loading_text = (
             "🗑️ **CLEARING CHATS**\n\n"
@@ -708,71 +1118,103 @@ class SessionManager:
         except:
             await event.respond(loading_text)
         
+        cleared_count = 0
+        progress_task = None
+        
         try:
-            session_data = self.valid_sessions[user_id]
-            session_path = session_data['session_path'].replace('.session', '')
-            
-            client = TelegramClient(session_path, self.api_id, self.api_hash)
-            await client.connect()
-            
-            cleared_count = 0
-            total_chats = 0
-            
-            # Count total private chats first
-            async for dialog in client.iter_dialogs():
-                if dialog.is_user:
-                    total_chats += 1
-            
-            # Update status
-            try:
-                await event.edit(
-                    "🗑️ **CLEARING CHATS**\n\n"
-                    f"📊 Found {total_chats} private chats\n"
-                    "🔄 Deleting conversations..."
-                )
-            except:
-                pass
-            
-            # Clear chats
-            async for dialog in client.iter_dialogs():
-                if dialog.is_user:
-                    try:
-                        await client.delete_dialog(dialog.entity)
-                        cleared_count += 1
-                        
-                        # Update progress every 10 deletions
-                        if cleared_count % 10 == 0:
+            async with self._session_client(user_id) as client:
+                # Kumpulkan semua private chat sekali jalan (chat bot tidak ikut dihapus)
+                dialogs = [
+                    d for d in await self._get_dialogs(user_id, client)
+                    if d.is_user and not getattr(d.entity, 'bot', False)
+                ]
+                # Dialog yang dihapus membuat cache basi
+                self._dialog_cache.pop(user_id, None)
+                total_chats = len(dialogs)
+                
+                # Update status
+                try:
+                    await event.edit(
+                        "🗑️ **CLEARING CHATS**\n\n"
+                        f"📊 Found {total_chats} private chats\n"
+                        "🔄 Deleting conversations..."
+                    )
+                except:
+                    pass
+                
+                # Clear chats secara paralel (dibatasi semaphore dan rate limiter)
+                sem = asyncio.Semaphore(10)
+                bucket = self._get_bucket(user_id, 'delete')
+                last_edit = 0.0
+                last_text = None
+                
+                flood_stop = 0
+                
+                async def drop(dialog):
+                    nonlocal cleared_count, last_edit, progress_task, last_text, flood_stop
+                    async with sem:
+                        if flood_stop:
+                            return 0
+                        # RPC langsung dengan peer yang sudah ter-resolve dari dialog
+                        request = DeleteHistoryRequest(peer=dialog.input_entity, max_id=0, revoke=False)
+                        try:
+                            await bucket.acquire()
                             try:
-                                await event.edit(
-                                    "🗑️ **CLEARING CHATS**\n\n"
-                                    f"📊 Total: {total_chats} chats\n"
-                                    f"✅ Cleared: {cleared_count}\n"
-                                    f"⏳ Remaining: {total_chats - cleared_count}"
-                                )
-                            except:
-                                pass
+                                await client(request)
+                            except FloodWaitError as e:
+                                if e.seconds > self.FLOOD_RETRY_MAX:
+                                    raise
+                                # Tahan semua worker sesuai permintaan server lalu ulangi chat yang sama
+                                bucket.penalize(e.seconds)
+                                await bucket.acquire()
+                                await client(request)
+                        except FloodWaitError as e:
+                            if e.seconds > self.FLOOD_RETRY_MAX:
+                                # Jangan tahan worker berjam-jam, sisa chat tidak diproses
+                                logger.error(f"Flood wait {e.seconds}s deleting chat, stopping")
+                                flood_stop = max(flood_stop, e.seconds)
+                            else:
+                                logger.error(f"Flood wait {e.seconds}s deleting chat after retry")
+                                bucket.penalize(e.seconds)
+                            return 0
+                        except Exception as e:
+                            logger.error(f"Error deleting chat: {e}")
+                            return 0
+                        cleared_count += 1
                         
-                        # Small delay to avoid flood limits
-                        await asyncio.sleep(0.1)
-                    except Exception as e:
-                        logger.error(f"Error deleting chat: {e}")
-                        continue
-            
-            await client.disconnect()
-            
-            result_text = (
-                "✅ **CHAT CLEARING COMPLETE**\n\n"
-                "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
-                "┃       📊  **RESULTS**  📊       ┃\n"
-                "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
-                f"🗑️ **Chats Cleared:** `{cleared_count}`\n"
-                f"📊 **Total Found:** `{total_chats}`\n"
-                f"📱 **Success Rate:** `{round((cleared_count/total_chats)*100 if total_chats > 0 else 0)}%`\n\n"
-                "🎉 Private chats berhasil dibersihkan!"
-            )
-            
-            buttons = [[Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]]
-            await event.edit(result_text, buttons=buttons)
+                        # Update progress berdasarkan waktu, penghapusan beruntun cukup satu edit
+                        now = time.monotonic()
+                        if now - last_edit > self.PROGRESS_INTERVAL:
+                            text = _CLEAR_PROGRESS.format(
+                                tot=total_chats, c=cleared_count, r=total_chats - cleared_count
+                            )
+                            # Teks yang sama hanya akan dibalas MessageNotModified, lewati
+                            if text != last_text:
+                                last_edit = now
+                                last_text = text
+                                progress_task = self._push_progress(progress_task, event, text)
+                        return 1
+                
+                results = await asyncio.gather(*(drop(d) for d in dialogs), return_exceptions=True)
+                cleared_count = sum(r for r in results if r == 1)
+                
+                # Pastikan edit progress terakhir tidak menimpa hasil akhir
+                await self._settle_progress(progress_task)
+                
+                result_text = (
+                    "✅ **CHAT CLEARING COMPLETE**\n\n"
+                    "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
+                    "┃       📊  **RESULTS**  📊       ┃\n"
+                    "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
+                    f"🗑️ **Chats Cleared:** `{cleared_count}`\n"
+                    f"📊 **Total Found:** `{total_chats}`\n"
+                    f"📱 **Success Rate:** `{round((cleared_count/total_chats)*100 if total_chats > 0 else 0)}%`\n\n"
+                    + (f"⏸️ **Stopped:** flood wait `{flood_stop}s`, coba lagi nanti\n\n" if flood_stop else "")
+                    + "🎉 Private chats berhasil dibersihkan!"
+                )
+                
+                buttons = self._back_button(user_id)
+                await event.edit(result_text, buttons=buttons)
             
         except Exception as e:
             error_text = (
@@ -781,13 +1223,14 @@ class SessionManager:
                 f"✅ **Cleared:** `{cleared_count}` chats before error\n\n"
                 "💡 Some chats may have been cleared successfully"
             )
-            buttons = [[Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]]
+            await self._settle_progress(progress_task)
+            buttons = self._back_button(user_id)
             try:
                 await event.edit(error_text, buttons=buttons)
             except:
                 await event.respond(error_text, buttons=buttons)
     
-    async def leave_groups(self, event, user_id: str):
+    async def leave_groups(self, event, user_id: int):
         """Keluar dari semua grup kecuali yang dia admin/owner"""
         loading_text = (
             "🚪 **LEAVING GROUPS**\n\n"
@@ -800,94 +1243,167 @@ class SessionManager:
         except:
             await event.respond(loading_text)
         
+        # Dipakai juga di pesan error, jadi harus ada sebelum client terhubung
+        left_count = 0
+        admin_count = 0
+        total_groups = 0
+        error_count = 0
+        queued = 0
+        processed = 0
+        progress_task = None
+        
         try:
-            session_data = self.valid_sessions[user_id]
-            session_path = session_data['session_path'].replace('.session', '')
-            
-            client = TelegramClient(session_path, self.api_id, self.api_hash)
-            await client.connect()
-            
-            me = await client.get_me()
-            left_count = 0
-            admin_count = 0
-            total_groups = 0
-            error_count = 0
-            
-            # Count and categorize groups
-            groups_to_leave = []
-            admin_groups = []
-            
-            async for dialog in client.iter_dialogs():
-                if dialog.is_group or dialog.is_channel:
-                    total_groups += 1
-                    try:
-                        permissions = await client.get_permissions(dialog.entity, me)
+            async with self._session_client(user_id) as client:
+                # Hasil klasifikasi yang masih segar (mis. dari menu akun) langsung dipakai
+                cached = self._admin_cache.pop(user_id, None)
+                if not (cached and time.monotonic() - cached[0] < self.ADMIN_CACHE_TTL):
+                    cached = None
+                
+                # Daftar grup akan berubah setelah keluar, jangan pakai cache lama lagi
+                self._dialog_cache.pop(user_id, None)
+                
+                queue = asyncio.Queue(maxsize=32)
+                bucket = self._get_bucket(user_id, 'leave')
+                last_edit = 0.0
+                last_text = None
+                flood_stop = 0
+                
+                async def enqueue(dialog):
+                    nonlocal queued
+                    if flood_stop:
+                        return
+                    queued += 1
+                    await queue.put(dialog)
+                
+                async def produce():
+                    # Grup non-admin masuk antrean selagi dialog masih di-enumerate
+                    nonlocal admin_count, error_count, total_groups
+                    if cached:
+                        admin_groups, groups_to_leave, error_groups = cached[1]
+                        admin_count = len(admin_groups)
+                        error_count += len(error_groups)
+                        total_groups = admin_count + len(groups_to_leave) + len(error_groups)
+                        for dialog in groups_to_leave:
+                            await enqueue(dialog)
+                    else:
+                        unresolved = []
+                        async for dialog in client.iter_dialogs():
+                            if flood_stop:
+                                break
+                            if not (dialog.is_group or dialog.is_channel):
+                                continue
+                            total_groups += 1
+                            is_admin = self._admin_flag(dialog.entity)
+                            if is_admin is None:
+                                unresolved.append(dialog)
+                            elif is_admin:
+                                admin_count += 1
+                            else:
+                                await enqueue(dialog)
                         
-                        if permissions.is_admin or permissions.is_creator:
-                            admin_groups.append(dialog)
-                            admin_count += 1
-                        else:
-                            groups_to_leave.append(dialog)
-                    except Exception as e:
-                        logger.error(f"Error checking permissions for {dialog.name}: {e}")
-                        error_count += 1
-            
-            # Update status
-            try:
-                await event.edit(
-                    "🚪 **LEAVING GROUPS**\n\n"
-                    f"📊 **Analysis Complete:**\n"
-                    f"• Total Groups: `{total_groups}`\n"
-                    f"• Admin/Owner: `{admin_count}`\n"
-                    f"• To Leave: `{len(groups_to_leave)}`\n\n"
-                    "🔄 Starting group exit process..."
-                )
-            except:
-                pass
-            
-            # Leave non-admin groups
-            for i, dialog in enumerate(groups_to_leave, 1):
-                try:
-                    await client.delete_dialog(dialog.entity)
-                    left_count += 1
+                        # Dialog tanpa flag dicek sekaligus setelah enumerasi, tidak satu per satu
+                        if unresolved:
+                            permissions_list = await self._get_group_permissions(client, unresolved)
+                            for dialog, permissions in zip(unresolved, permissions_list):
+                                if permissions is None:
+                                    error_count += 1
+                                elif permissions.is_admin or permissions.is_creator:
+                                    admin_count += 1
+                                else:
+                                    await enqueue(dialog)
                     
-                    # Update progress every 5 groups
-                    if i % 5 == 0:
+                    # Sinyal berhenti hanya jika enumerasi selesai; jika gagal worker dibatalkan
+                    for _ in range(self.LEAVE_WORKERS):
+                        await queue.put(None)
+                
+                async def leave(dialog):
+                    # Channel/supergroup cukup satu RPC dengan peer dari dialog;
+                    # grup biasa tetap lewat delete_dialog (keluar + hapus riwayat)
+                    if dialog.is_channel:
+                        await client(LeaveChannelRequest(channel=dialog.input_entity))
+                    else:
+                        await client.delete_dialog(dialog.input_entity)
+                
+                async def consume():
+                    nonlocal left_count, error_count, processed, last_edit, progress_task, last_text, flood_stop
+                    while True:
+                        dialog = await queue.get()
+                        if dialog is None:
+                            return
+                        if flood_stop:
+                            # Sisa antrean hanya dikuras agar producer tidak tertahan
+                            continue
                         try:
-                            await event.edit(
-                                "🚪 **LEAVING GROUPS**\n\n"
-                                f"📊 Progress: `{i}/{len(groups_to_leave)}`\n"
-                                f"✅ Left: `{left_count}`\n"
-                                f"👑 Staying Admin: `{admin_count}`\n"
-                                f"⏳ Remaining: `{len(groups_to_leave) - i}`"
-                            )
-                        except:
+                            await bucket.acquire()
+                            try:
+                                await leave(dialog)
+                            except FloodWaitError as e:
+                                if e.seconds > self.FLOOD_RETRY_MAX:
+                                    raise
+                                # Tunggu sesuai permintaan server lalu ulangi grup yang sama
+                                logger.warning(f"Flood wait {e.seconds}s leaving group {dialog.name}, retrying")
+                                bucket.penalize(e.seconds)
+                                await bucket.acquire()
+                                await leave(dialog)
+                            left_count += 1
+                        except ChannelPrivateError:
+                            # Sudah tidak bisa diakses (dikeluarkan/di-ban), tidak ada yang perlu ditinggalkan
                             pass
-                    
-                    # Delay to avoid flood limits
-                    await asyncio.sleep(0.5)
-                    
-                except Exception as e:
-                    logger.error(f"Error leaving group {dialog.name}: {e}")
-                    error_count += 1
-                    continue
-            
-            await client.disconnect()
-            
-            result_text = (
-                "✅ **GROUP EXIT COMPLETE**\n\n"
-                "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
-                "┃       📊  **RESULTS**  📊       ┃\n"
-                "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
-                f"🚪 **Groups Left:** `{left_count}`\n"
-                f"👑 **Still Admin In:** `{admin_count}`\n"
-                f"📊 **Total Processed:** `{total_groups}`\n"
-                f"❌ **Errors:** `{error_count}`\n\n"
-                "🎉 Group cleanup berhasil diselesaikan!"
-            )
-            
-            buttons = [[Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]]
-            await event.edit(result_text, buttons=buttons)
+                        except FloodWaitError as e:
+                            if e.seconds > self.FLOOD_RETRY_MAX:
+                                # Jangan tahan worker berjam-jam, sisa grup tidak diproses
+                                logger.error(f"Flood wait {e.seconds}s leaving group {dialog.name}, stopping")
+                                flood_stop = max(flood_stop, e.seconds)
+                            else:
+                                logger.error(f"Flood wait {e.seconds}s leaving group {dialog.name} after retry")
+                                bucket.penalize(e.seconds)
+                            error_count += 1
+                        except Exception as e:
+                            logger.error(f"Error leaving group {dialog.name}: {e}")
+                            error_count += 1
+                        processed += 1
+                        
+                        # Update progress maksimal tiap PROGRESS_INTERVAL detik
+                        now = time.monotonic()
+                        if now - last_edit > self.PROGRESS_INTERVAL:
+                            text = _LEAVE_PROGRESS.format(
+                                i=processed, tot=queued, left=left_count,
+                                admin=admin_count, r=queued - processed
+                            )
+                            # Teks yang sama hanya akan dibalas MessageNotModified, lewati
+                            if text != last_text:
+                                last_edit = now
+                                last_text = text
+                                progress_task = self._push_progress(progress_task, event, text)
+                
+                workers = [asyncio.create_task(consume()) for _ in range(self.LEAVE_WORKERS)]
+                try:
+                    await produce()
+                    await asyncio.gather(*workers)
+                finally:
+                    # Producer gagal: hentikan worker sebelum pesan error ditampilkan
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                
+                # Pastikan edit progress terakhir tidak menimpa hasil akhir
+                await self._settle_progress(progress_task)
+                
+                result_text = (
+                    "✅ **GROUP EXIT COMPLETE**\n\n"
+                    "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
+                    "┃       📊  **RESULTS**  📊       ┃\n"
+                    "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
+                    f"🚪 **Groups Left:** `{left_count}`\n"
+                    f"👑 **Still Admin In:** `{admin_count}`\n"
+                    f"📊 **Total Processed:** `{total_groups}`\n"
+                    f"❌ **Errors:** `{error_count}`\n\n"
+                    + (f"⏸️ **Stopped:** flood wait `{flood_stop}s`, coba lagi nanti\n\n" if flood_stop else "")
+                    + "🎉 Group cleanup berhasil diselesaikan!"
+                )
+                
+                buttons = self._back_button(user_id)
+                await event.edit(result_text, buttons=buttons)
             
         except Exception as e:
             error_text = (
@@ -897,13 +1413,14 @@ class SessionManager:
                 f"👑 **Admin:** `{admin_count}` groups preserved\n\n"
                 "💡 Partial completion may have occurred"
             )
-            buttons = [[Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]]
+            await self._settle_progress(progress_task)
+            buttons = self._back_button(user_id)
             try:
                 await event.edit(error_text, buttons=buttons)
             except:
                 await event.respond(error_text, buttons=buttons)
     
-    async def check_sessions(self, event, user_id: str):
+    async def check_sessions(self, event, user_id: int):
         """Cek session aktif dengan opsi hapus semua"""
         loading_text = (
             "📱 **CHECKING SESSIONS**\n\n"
@@ -917,77 +1434,58 @@ class SessionManager:
             await event.respond(loading_text)
         
         try:
-            session_data = self.valid_sessions[user_id]
-            session_path = session_data['session_path'].replace('.session', '')
-            
-            client = TelegramClient(session_path, self.api_id, self.api_hash)
-            await client.connect()
-            
-            # Get active sessions
-            result = await client(GetAuthorizationsRequest())
-            
-            current_sessions = [auth for auth in result.authorizations if not auth.current]
-            current_session = next((auth for auth in result.authorizations if auth.current), None)
-            
-            await client.disconnect()
-            
-            text = (
-                "📱 **ACTIVE SESSIONS**\n\n"
-                "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
-                "┃      📊  **OVERVIEW**  📊      ┃\n"
-                "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
-                f"🔄 **Current Session:** `1 device`\n"
-                f"📱 **Other Sessions:** `{len(current_sessions)} devices`\n"
-                f"📊 **Total Active:** `{len(result.authorizations)} devices`\n\n"
-            )
-            
-            if current_session:
-                text += "🔄 **CURRENT DEVICE:**\n"
-                device_info = f"{current_session.device_model} - {current_session.platform}"
-                if len(device_info) > 30:
-                    device_info = device_info[:30] + "..."
+            async with self._session_client(user_id) as client:
+                # Get active sessions
+                result = await client(GetAuthorizationsRequest())
+                # Simpan sebentar agar kill_all_sessions tidak perlu query ulang
+                self._auth_cache[user_id] = (time.monotonic(), result)
                 
-                text += f"• `{device_info}`\n"
-                text += f"• 📍 {current_session.country}, {current_session.region}\n"
+                current_sessions = [auth for auth in result.authorizations if not auth.current]
+                current_session = next((auth for auth in result.authorizations if auth.current), None)
                 
-                try:
-                    if current_session.date_active:
-                        date_active = datetime.fromtimestamp(current_session.date_active)
-                        text += f"• 🕒 {date_active.strftime('%d/%m/%Y %H:%M')}\n"
-                except:
-                    text += f"• 🕒 Active now\n"
-                text += "\n"
-            
-            if current_sessions:
-                text += f"📱 **OTHER DEVICES ({len(current_sessions)}):**\n"
-                for i, auth in enumerate(current_sessions[:5], 1):  # Show max 5
-                    device_info = f"{auth.device_model} - {auth.platform}"
-                    if len(device_info) > 25:
-                        device_info = device_info[:25] + "..."
-                    
-                    text += f"**{i}.** `{device_info}`\n"
-                    text += f"     📍 {auth.country}, {auth.region}\n"
+                parts = [
+                    "📱 **ACTIVE SESSIONS**\n\n"
+                    "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
+                    "┃      📊  **OVERVIEW**  📊      ┃\n"
+                    "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
+                    f"🔄 **Current Session:** `1 device`\n"
+                    f"📱 **Other Sessions:** `{len(current_sessions)} devices`\n"
+                    f"📊 **Total Active:** `{len(result.authorizations)} devices`\n\n"
+                ]
+                
+                if current_session:
+                    device_info, active = _format_auth(current_session)
+                    parts.append("🔄 **CURRENT DEVICE:**\n")
+                    parts.append(f"• `{device_info}`\n")
+                    parts.append(f"• 📍 {current_session.country}, {current_session.region}\n")
+                    parts.append(f"• 🕒 {active or 'Active now'}\n\n")
+                
+                if current_sessions:
+                    parts.append(f"📱 **OTHER DEVICES ({len(current_sessions)}):**\n")
+                    for i, auth in enumerate(current_sessions[:5], 1):  # Show max 5
+                        device_info, active = _format_auth(auth, 25)
+                        parts.append(f"**{i}.** `{device_info}`\n")
+                        parts.append(f"     📍 {auth.country}, {auth.region}\n")
+                        parts.append(f"     🕒 {active or 'Recently active'}\n\n")
                     
-                    try:
-                        if auth.date_active:
-                            date_active = datetime.fromtimestamp(auth.date_active)
-                            text += f"     🕒 {date_active.strftime('%d/%m/%Y %H:%M')}\n"
-                    except:
-                        text += f"     🕒 Recently active\n"
-                    text += "\n"
+                    if len(current_sessions) > 5:
+                        parts.append(f"... and {len(current_sessions) - 5} more devices\n\n")
+                else:
+                    parts.append("✅ **No other active sessions found**\n\n")
                 
-                if len(current_sessions) > 5:
-                    text += f"... and {len(current_sessions) - 5} more devices\n\n"
-            else:
-                text += "✅ **No other active sessions found**\n\n"
-            
-            buttons = []
-            if current_sessions:
-                buttons.append([Button.inline("❌ KILL ALL OTHER SESSIONS", f"killall_{user_id}".encode())])
-            
-            buttons.append([Button.inline("⬅️ BACK", f"acc_{user_id}".encode())])
-            
-            await event.edit(text, buttons=buttons)
+                text = "".join(parts)
+                
+                buttons = []
+                if current_sessions:
+                    # Jumlah session lain ikut dikirim agar kill_all tidak perlu query ulang
+                    buttons.append([Button.inline(
+                        "❌ KILL ALL OTHER SESSIONS",
+                        f"killall_{user_id}_{len(current_sessions)}".encode()
+                    )])
+                
+                buttons.extend(self._back_button(user_id))
+                
+                await event.edit(text, buttons=buttons)
             
         except Exception as e:
             error_text = (
@@ -995,13 +1493,13 @@ class SessionManager:
                 f"🚨 **Error:** `{str(e)}`\n\n"
                 "💡 Kemungkinan session expired atau tidak ada akses"
             )
-            buttons = [[Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]]
+            buttons = self._back_button(user_id)
             try:
                 await event.edit(error_text, buttons=buttons)
             except:
                 await event.respond(error_text, buttons=buttons)
     
-    async def kill_all_sessions(self, event, user_id: str):
+    async def kill_all_sessions(self, event, user_id: int, other_sessions_count: Optional[int] = None):
         """Hapus semua session aktif kecuali session saat ini"""
         loading_text = (
             "⚠️ **TERMINATING SESSIONS**\n\n"
@@ -1015,46 +1513,39 @@ class SessionManager:
             await event.respond(loading_text)
         
         try:
-            session_data = self.valid_sessions[user_id]
-            session_path = session_data['session_path'].replace('.session', '')
-            
-            client = TelegramClient(session_path, self.api_id, self.api_hash)
-            await client.connect()
-            
-            # Get current session count
-            result_before = await client(GetAuthorizationsRequest())
-            other_sessions_count = len([auth for auth in result_before.authorizations if not auth.current])
-            
-            # Reset all authorizations except current
-            await client(ResetAuthorizationsRequest())
-            
-            # Wait a moment for the operation to complete
-            await asyncio.sleep(2)
-            
-            # Verify the result
-            result_after = await client(GetAuthorizationsRequest())
-            remaining_sessions = len([auth for auth in result_after.authorizations if not auth.current])
-            
-            await client.disconnect()
-            
-            text = (
-                "✅ **SESSION TERMINATION COMPLETE**\n\n"
-                "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
-                "┃       📊  **RESULTS**  📊       ┃\n"
-                "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
-                f"❌ **Sessions Killed:** `{other_sessions_count}`\n"
-                f"✅ **Current Session:** `Active & Protected`\n"
-                f"📱 **Remaining Others:** `{remaining_sessions}`\n\n"
-                "🔐 **Security Status:** All other devices have been logged out\n"
-                "🎉 **Account secured successfully!**"
-            )
-            
-            buttons = [
-                [Button.inline("🔄 CHECK SESSIONS", f"sessions_{user_id}".encode())],
-                [Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]
-            ]
-            
-            await event.edit(text, buttons=buttons)
+            async with self._session_client(user_id) as client:
+                # Hasil check_sessions yang masih segar lebih akurat daripada jumlah di tombol
+                # (tombol bisa ditekan berjam-jam kemudian); query ulang hanya jika keduanya tidak ada
+                cached = self._auth_cache.get(user_id)
+                if cached and time.monotonic() - cached[0] < self.AUTH_CACHE_TTL:
+                    other_sessions_count = sum(1 for auth in cached[1].authorizations if not auth.current)
+                elif other_sessions_count is None:
+                    result_before = await client(GetAuthorizationsRequest())
+                    other_sessions_count = sum(1 for auth in result_before.authorizations if not auth.current)
+                
+                # Reset all authorizations except current. Respons True sudah cukup,
+                # verifikasi ulang lewat tombol VERIFY
+                await client(ResetAuthorizationsRequest())
+                self._auth_cache.pop(user_id, None)
+                
+                text = (
+                    "✅ **SESSION TERMINATION COMPLETE**\n\n"
+                    "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━┓\n"
+                    "┃       📊  **RESULTS**  📊       ┃\n"
+                    "┗━━━━━━━━━━━━━━━━━━━━━━━━━━━┛\n\n"
+                    f"❌ **Sessions Killed:** `{other_sessions_count}`\n"
+                    f"✅ **Current Session:** `Active & Protected`\n"
+                    "📱 **Remaining Others:** `0`\n\n"
+                    "🔐 **Security Status:** All other devices have been logged out\n"
+                    "🎉 **Account secured successfully!**"
+                )
+                
+                buttons = [
+                    [Button.inline("🔄 VERIFY", f"sessions_{user_id}".encode())],
+                    *self._back_button(user_id)
+                ]
+                
+                await event.edit(text, buttons=buttons)
             
         except Exception as e:
             error_text = (
@@ -1066,7 +1557,7 @@ class SessionManager:
                 "• API rate limiting\n\n"
                 "🔄 Try again in a few moments"
             )
-            buttons = [[Button.inline("⬅️ BACK", f"acc_{user_id}".encode())]]
+            buttons = self._back_button(user_id)
             try:
                 await event.edit(error_text, buttons=buttons)
             except:
@@ -1105,6 +1596,9 @@ async def main():
         print(f"❌ Fatal error: {e}")
         logger.error(f"Fatal error: {e}")
     finally:
+        # Tutup semua koneksi client akun
+        await manager.close_clients()
+        
         # Cleanup temp directory
         try:
             shutil.rmtree(manager.temp_dir)